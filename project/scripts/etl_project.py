@@ -1,9 +1,16 @@
 import os
+import functools
+import csv
+import io
 import json
 from pathlib import Path
 from typing import Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 import pymongo
@@ -12,10 +19,48 @@ from google.cloud import bigquery
 import gc
 import psutil
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from itertools import islice
 
 # ==============================================================
 # Utilitários auxiliares
 # ==============================================================
+@functools.lru_cache(maxsize=None)
+def get_config(env_path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Load environment variables from a .env file and return them as a dictionary.
+
+    The result is cached per env_path, so the .env file is parsed only once per process.
+
+    Args:
+        env_path (Optional[str]): Path to the .env file. If not provided, searches in the current or parent directory.
+
+    Returns:
+        Dict[str, str]: Dictionary containing database and API credentials.
+    """
+    if env_path:
+        load_dotenv(env_path)
+    else:
+        # procura .env no diretório atual / parent
+        load_dotenv()
+
+    return {
+        "DB_USER": os.getenv("DB_USER"),
+        "DB_PASSWORD": os.getenv("DB_PASSWORD"),
+        "DB_HOST": os.getenv("DB_HOST"),
+        "DB_PORT": os.getenv("DB_PORT"),
+        "DB_NAME": os.getenv("DB_NAME"),
+        "MONGO_USER": os.getenv("MONGO_USER"),
+        "MONGO_PASSWORD": os.getenv("MONGO_PASSWORD"),
+        "MONGO_HOST": os.getenv("MONGO_HOST"),
+        "MONGO_NAME" : os.getenv("MONGO_NAME"),
+        "MONGO_PORT": os.getenv("MONGO_PORT"),
+        "MONGO_AUTH_SOURCE": os.getenv("MONGO_AUTH_SOURCE"),
+        "BIG_QUERY_DATASET" : os.getenv("BIG_QUERY_DATASET"),
+        "BIG_QUERY_TABLE_ID" : os.getenv("BIG_QUERY_TABLE_ID"),
+        "BIG_QUERY_PROJECT_ID" : os.getenv("BIG_QUERY_PROJECT_ID"),
+    }
+
 class MemoryManager():
     """
     Classe para gerenciamento de memória.
@@ -42,22 +87,20 @@ class MemoryManager():
         
         if usage > max_percent:
             gc.collect()
-            time.sleep(0.5)
             print("Memória limpa.")
 
     @staticmethod
-    def wait_memory(max_percent = 90, max_wait_minutes = 5):
+    def wait_memory(max_percent = 90, max_wait_minutes = 5, max_sleep_seconds = 4):
+        # Caminho rápido: memória já abaixo do limite, sem espera
+        usage = MemoryManager.get_memory()
+        if usage is None or usage <= max_percent:
+            return True
+
         start_wait = time.time()
         max_time_seconds = max_wait_minutes * 60
+        sleep_seconds = 1
         
         while True:
-            usage = MemoryManager.get_memory()
-            if usage is None:
-                return True
-            
-            if usage <= max_percent:
-                return True
-            
             elapsed_time = (time.time() - start_wait)
             if elapsed_time >= max_time_seconds:
                 print("Tempo máximo de espera atingido.")
@@ -65,36 +108,45 @@ class MemoryManager():
             
             print(f"Uso de memória alto ({usage}%). Aguardando...")
             MemoryManager.clean_memory(max_percent)
-            time.sleep(5)
+
+            # Espera adaptativa (1 -> 2 -> 4s), limitada ao tempo restante
+            time.sleep(min(sleep_seconds, max_time_seconds - elapsed_time))
+            sleep_seconds = min(sleep_seconds * 2, max_sleep_seconds)
+
+            usage = MemoryManager.get_memory()
+            if usage is None or usage <= max_percent:
+                return True
         
 class RobustAPI():
     """
     Classe para chamadas robustas à API com tentativas e tratamento de erros.
     """
     
-    def __init__(self, url, headers):
+    def __init__(self, url, headers, max_retries=5):
         self.url = url.strip('/')
         self.headers = headers
+
+        # Sessão com keep-alive; tentativas e backoff ficam a cargo do urllib3
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
-    def makeRequest(self, endpoint, params=None, max_retries=5):
-        attempt = 0
-        while attempt < max_retries:
-            try:
-                full_url = f"{self.url}/{endpoint.lstrip('/')}"
-                response = requests.get(full_url, headers=self.headers, params=params)
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code in [429, 500, 502, 503, 504]:
-                    print(f"Tentativa {attempt+1}/{max_retries} - Erro temporário ({response.status_code}). Tentando novamente...")
-                    attempt += 1
-                    time.sleep(2 ** attempt)
-                else:
-                    print(f"Erro ao chamar API: {response.status_code} - {response.text}")
-                    response.raise_for_status()
-            except requests.RequestException as e:
-                print(f"Exceção durante a chamada à API: {e}")
-                attempt += 1
-                time.sleep(2 ** attempt)
+    def makeRequest(self, endpoint, params=None):
+        full_url = f"{self.url}/{endpoint.lstrip('/')}"
+        try:
+            response = self.session.get(full_url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            print(f"Exceção durante a chamada à API: {e}")
+            return None
 
 # ==============================================================
 # Classe APIs ETL
@@ -103,6 +155,9 @@ class UserData(RobustAPI):
     """
     Classe para processo de extract e transform da API de usuários.
     """
+    # Tabela de tradução para o nome das colunas ('.' -> '_') em uma única passada
+    COLUMN_TRANSLATION = str.maketrans({'.': '_'})
+
     def __init__(self, api_url):
        #Controle de memória
        MemoryManager.wait_memory(max_percent=90, max_wait_minutes=5) 
@@ -112,12 +167,60 @@ class UserData(RobustAPI):
        
        MemoryManager.clean_memory(max_percent=90)
        
-    def fetch_data(self):
+    def fetch_data(self, results=5000, pages=1, max_workers=10, seed=None):
         """
         Extrai os dados da API.
+
+        Args:
+            results (int): Quantidade de usuários retornados em uma única requisição.
+            pages (int): Quantidade de páginas buscadas; acima de 1, as requisições são feitas em paralelo.
+            max_workers (int): Quantidade máxima de requisições simultâneas.
+            seed (str): Seed compartilhada entre as páginas, para que a paginação seja determinística.
+                Se não informada, uma seed aleatória é gerada para a extração.
+        Returns:
+            dict: Dados extraídos da API, com os resultados de todas as páginas em 'results',
+                ou None se alguma página falhar.
         """
-        return self.client.makeRequest(endpoint='', params={})
+        if pages <= 1:
+            return self.client.makeRequest(endpoint='', params={'results': results})
+
+        # A API só pagina de forma determinística quando todas as páginas usam a mesma seed
+        seed = seed or os.urandom(8).hex()
+        params_list = [{'results': results, 'page': page, 'seed': seed} for page in range(1, pages + 1)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda params: self.client.makeRequest(endpoint='', params=params), params_list))
+
+        # Extração parcial não é tratada como sucesso
+        if failed_pages := sum(1 for response in responses if not response):
+            print(f"Falha ao obter {failed_pages}/{pages} páginas da API.")
+            return None
+
+        return {'results': [record for response in responses for record in response['results']]}
     
+    @staticmethod
+    def _flatten_record(record, prefix=''):
+        """
+        Achata um registro aninhado da API em um único dicionário.
+
+        As chaves são unidas por '_' e os valores numéricos já saem como string.
+
+        Args:
+            record (dict): Registro retornado pela API.
+            prefix (str): Prefixo das chaves do nível atual.
+        Returns:
+            dict: Registro achatado.
+        """
+        flat = {}
+        for key, value in record.items():
+            column = f"{prefix}{key}"
+            if isinstance(value, dict):
+                flat.update(UserData._flatten_record(value, prefix=f"{column}_"))
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                flat[column] = str(value)
+            else:
+                flat[column] = value
+        return flat
+
     def data_transform(self, data):
         """
         Transforma os dados extraídos da API em um DataFrame e faz tratamentos necessários.
@@ -127,116 +230,166 @@ class UserData(RobustAPI):
         Returns:
             pd.DataFrame: DataFrame transformado.
         """
-        data_df = pd.json_normalize(data['results'])
-
-        # Tratando o nome das colunas
-        data_df.columns = (
-            data_df.columns
-            .str.replace('.', '_', regex=False)
-            .str.lower()
-            .str.strip()
-        )
+        # Valores numéricos convertidos para string já na extração
+        rows = [self._flatten_record(record) for record in data['results']]
+        data_df = pd.DataFrame(rows, dtype=object)
 
-        # Convertendo os valores numéricos para string
-        numeric_columns = data_df.select_dtypes(include=['int64', 'float64']).columns
-        data_df[numeric_columns] = data_df[numeric_columns].astype(str)
+        # Tratando o nome das colunas (uma única passada por coluna)
+        data_df.columns = [column.translate(self.COLUMN_TRANSLATION).lower().strip() for column in data_df.columns]
 
         return data_df
 
 # ==============================================================
 # Classes de Loaders nos Bancos
 # ==============================================================
+def psql_insert_copy(table, conn, keys, data_iter):
+    """
+    Insertion method for `DataFrame.to_sql` that streams rows through PostgreSQL `COPY ... FROM STDIN`.
+
+    Args:
+        table (pandas.io.sql.SQLTable): Target table.
+        conn (sqlalchemy.engine.Connection): Active connection.
+        keys (list): Column names.
+        data_iter (Iterable): Iterable of row tuples.
+    """
+    dbapi_conn = conn.connection
+    with dbapi_conn.cursor() as cur:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(data_iter)
+        buffer.seek(0)
+
+        columns = ', '.join(f'"{k}"' for k in keys)
+        table_name = f"{table.schema}.{table.name}" if table.schema else table.name
+
+        cur.copy_expert(sql=f"COPY {table_name} ({columns}) FROM STDIN WITH CSV", file=buffer)
+
 class DataLoader:
     """
     Classe para carregar dados em diferentes bancos de dados.
     """
     def __init__(self, env_path: Optional[str] = None):
-        self.config = self.load_config(env_path) 
+        self.config = get_config(env_path) 
+
+        # Conexões reaproveitadas entre cargas (criadas sob demanda)
+        self._pg_engine = None
+        self._mongo_client = None
+        self._bq_client = None
     
-    def load_config(self,env_path: Optional[str] = None) -> Dict[str, str]:
+    def _get_postgresql_engine(self, config):
         """
-        Load environment variables from a .env file and return them as a dictionary.
+        Return the cached SQLAlchemy engine, creating it on first use.
 
         Args:
-            env_path (Optional[str]): Path to the .env file. If not provided, searches in the current or parent directory.
+            config (dict): Database configuration.
+        """
+        if self._pg_engine is None:
+            DB_HOST = config["DB_HOST"]
+            DB_USER = config["DB_USER"]
+            DB_PASSWORD = config["DB_PASSWORD"]
+            DB_NAME = config["DB_NAME"]
+            DB_PORT = config["DB_PORT"]
 
-        Returns:
-            Dict[str, str]: Dictionary containing database and API credentials.
+            DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+            self._pg_engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=8)
+
+        return self._pg_engine
+
+    def _get_mongodb_client(self, config):
         """
-        if env_path:
-            load_dotenv(env_path)
-        else:
-            # procura .env no diretório atual / parent
-            load_dotenv()
-
-        return {
-            "DB_USER": os.getenv("DB_USER"),
-            "DB_PASSWORD": os.getenv("DB_PASSWORD"),
-            "DB_HOST": os.getenv("DB_HOST"),
-            "DB_PORT": os.getenv("DB_PORT"),
-            "DB_NAME": os.getenv("DB_NAME"),
-            "MONGO_USER": os.getenv("MONGO_USER"),
-            "MONGO_PASSWORD": os.getenv("MONGO_PASSWORD"),
-            "MONGO_HOST": os.getenv("MONGO_HOST"),
-            "MONGO_NAME" : os.getenv("MONGO_NAME"),
-            "MONGO_PORT": os.getenv("MONGO_PORT"),
-            "MONGO_AUTH_SOURCE": os.getenv("MONGO_AUTH_SOURCE"),
-            "BIG_QUERY_DATASET" : os.getenv("BIG_QUERY_DATASET"),
-            "BIG_QUERY_TABLE_ID" : os.getenv("BIG_QUERY_TABLE_ID"),
-            "BIG_QUERY_PROJECT_ID" : os.getenv("BIG_QUERY_PROJECT_ID"),
-        }
-
-    def postgresql_load(self, data_df, config):
+        Return the cached MongoDB client, creating it on first use.
+
+        Args:
+            config (dict): Database configuration.
+        """
+        if self._mongo_client is None:
+            USERNAME = config["MONGO_USER"]
+            PASSWORD = config["MONGO_PASSWORD"]
+            HOST = config["MONGO_HOST"]
+            PORT = config["MONGO_PORT"]
+            DATABASE_NAME = config["MONGO_NAME"]
+            AUTH_SOURCE = config["MONGO_AUTH_SOURCE"]
+
+            connection_string = f"mongodb://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}?authSource={AUTH_SOURCE}"
+            self._mongo_client = MongoClient(connection_string, maxPoolSize=100, minPoolSize=10)
+
+        return self._mongo_client
+
+    def _get_bigquery_client(self):
+        """
+        Return the cached BigQuery client, creating it on first use.
+        """
+        if self._bq_client is None:
+            self._bq_client = bigquery.Client()
+
+        return self._bq_client
+
+    def postgresql_load(self, data_df, config, use_copy=True):
         """
         Load the DataFrame into a PostgreSQL database.
 
         Args:
             data_df (pd.DataFrame): DataFrame to be loaded.
             config (dict): Database configuration.
+            use_copy (bool): Use COPY FROM STDIN; if False, falls back to multi-row INSERTs.
         """
-        DB_HOST = config["DB_HOST"]
-        DB_USER = config["DB_USER"]
-        DB_PASSWORD = config["DB_PASSWORD"]
-        DB_NAME = config["DB_NAME"]
-        DB_PORT = config["DB_PORT"]
-
-        DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        engine = create_engine(DATABASE_URL)
+        engine = self._get_postgresql_engine(config)
 
         colunas_relacionais = ['email','name_title', 'name_first', 'name_last', 'location_street_number', 'location_street_name','location_city', 'location_state', 'location_country', 'location_postcode']
-        data_relacionais = data_df[colunas_relacionais].copy()
-
-        data_relacionais.to_sql(
-            name='users', 
-            con=engine, 
-            if_exists='append', 
-            index=False,
-            chunksize=1000
-        )
-
-    def mongodb_load(self, data_df, config):
+        data_relacionais = data_df.loc[:, colunas_relacionais]
+
+        if use_copy:
+            data_relacionais.to_sql(
+                name='users', 
+                con=engine, 
+                if_exists='append', 
+                index=False,
+                method=psql_insert_copy
+            )
+        else:
+            # 500 linhas x 10 colunas fica abaixo do limite de 65535 parâmetros do PostgreSQL
+            data_relacionais.to_sql(
+                name='users', 
+                con=engine, 
+                if_exists='append', 
+                index=False,
+                chunksize=500,
+                method='multi'
+            )
+
+    def mongodb_load(self, data_df, config, batch_size=1000, max_workers=4):
         """
         Load the DataFrame into a MongoDB database.
 
         Args:
             data_df (pd.DataFrame): DataFrame to be loaded.
             config (dict): Database configuration.
+            batch_size (int): Number of documents per insert_many call.
+            max_workers (int): Number of concurrent insert_many calls.
         """
-        USERNAME = config["MONGO_USER"]
-        PASSWORD = config["MONGO_PASSWORD"]
-        HOST = config["MONGO_HOST"]
-        PORT = config["MONGO_PORT"]
-        DATABASE_NAME = config["MONGO_NAME"]
-        AUTH_SOURCE = config["MONGO_AUTH_SOURCE"]
+        client = self._get_mongodb_client(config)
+        db = client[config["MONGO_NAME"]]
+        collection = db['users']
 
-        connection_string = f"mongodb://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}?authSource={AUTH_SOURCE}"
+        # Registros gerados sob demanda: só os lotes em andamento ficam em memória
+        columns = list(data_df.columns)
+        records = (dict(zip(columns, row)) for row in data_df.itertuples(index=False, name=None))
 
-        client = MongoClient(connection_string)
-        db = client[DATABASE_NAME]
-        collection = db['users']
+        def insert_batch(batch):
+            collection.insert_many(batch, ordered=False)
 
-        records = data_df.to_dict('records')
-        collection.insert_many(records)
+        # Inserções não ordenadas em paralelo (MongoClient é thread-safe)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            while batch := list(islice(records, batch_size)):
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(insert_batch, batch))
+
+            for future in pending:
+                future.result()
 
     def bigquery_load(self, data_df, config):
         """
@@ -246,7 +399,7 @@ class DataLoader:
             data_df (pd.DataFrame): DataFrame to be loaded.
             config (dict): Database configuration.
         """
-        client = bigquery.Client()
+        client = self._get_bigquery_client()
 
         DATASET_ID = config["BIG_QUERY_DATASET"]
         TABLE_ID = config["BIG_QUERY_TABLE_ID"]
@@ -254,20 +407,29 @@ class DataLoader:
 
         table_id_completo = f"{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}"
 
+        # Schema fixo (todas as colunas STRING) evita autodetecção; o Parquet é gerado com o mesmo schema
+        schema = pa.schema([(column, pa.string()) for column in data_df.columns])
         job_config = bigquery.LoadJobConfig(
             write_disposition="WRITE_APPEND", 
+            source_format=bigquery.SourceFormat.PARQUET,
+            schema=[bigquery.SchemaField(column, "STRING") for column in data_df.columns],
         )
 
-        job = client.load_table_from_dataframe(
-            data_df, 
+        # Colunas só com None/NaN (inferidas como null) ou com bool são convertidas para string
+        table = pa.Table.from_pandas(data_df, preserve_index=False).cast(schema)
+
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression='snappy')
+        buffer.seek(0)
+
+        job = client.load_table_from_file(
+            buffer, 
             table_id_completo, 
             job_config=job_config
         ) 
 
         job.result()  
 
-        table = client.get_table(table_id_completo)
-
 if __name__ == "__main__":
 
     #Inicializando 
@@ -277,7 +439,7 @@ if __name__ == "__main__":
     
     try:
         # Extração dos dados
-        if data := user_data_api.makeRequest(endpoint=''):
+        if data := user_data_api.fetch_data():
             print("Dados obtidos com sucesso da API.")
             
             # Transformação dos dados
@@ -287,17 +449,17 @@ if __name__ == "__main__":
             # Carregando as configurações do .env
             config = data_loader.config
 
-            # Carregando dados no PostgreSQL
-            data_loader.postgresql_load(data_df, config)
-            print("Dados carregados com sucesso no PostgreSQL.")
-
-            # Carregando dados no MongoDB
-            data_loader.mongodb_load(data_df, config)
-            print("Dados carregados com sucesso no MongoDB.")
-
-            # Carregando dados no BigQuery
-            data_loader.bigquery_load(data_df, config)
-            print("Dados carregados com sucesso no BigQuery.")
+            # Carregando dados no PostgreSQL, MongoDB e BigQuery em paralelo
+            loaders = {
+                "PostgreSQL": data_loader.postgresql_load,
+                "MongoDB": data_loader.mongodb_load,
+                "BigQuery": data_loader.bigquery_load,
+            }
+            with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+                futures = {executor.submit(load, data_df, config): name for name, load in loaders.items()}
+                for future in as_completed(futures):
+                    future.result()
+                    print(f"Dados carregados com sucesso no {futures[future]}.")
 
             MemoryManager.clean_memory(max_percent=90)
         else: